@@ -1,33 +1,88 @@
 import sys
 import os
 import math
+import functools
+from collections import Counter, defaultdict
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QToolBar, QAction, QGraphicsView, QGraphicsScene, 
                              QGraphicsItem, QGraphicsRectItem, QGraphicsTextItem,
                              QToolBox, QPushButton, QLabel, QSpinBox, QLineEdit,
-                             QTextEdit, QSplitter, QFileDialog, QMessageBox, QGroupBox,
+                             QPlainTextEdit, QSplitter, QFileDialog, QMessageBox, QGroupBox,
                              QFormLayout, QComboBox, QGraphicsEllipseItem, QGraphicsPolygonItem,
-                             QGraphicsPathItem, QGridLayout, QFrame)
-from PyQt5.QtCore import Qt, QRectF, QPointF, pyqtSignal, QTimer, QPointF, QLineF
-from PyQt5.QtGui import QPen, QBrush, QColor, QFont, QPainter, QPixmap, QPolygonF, QPainterPath, QPainterPathStroker, QTransform
-from pylatex import Document, TikZ, Command
+                             QGraphicsPathItem, QFrame)
+from PyQt5.QtCore import (Qt, QRectF, QPointF, pyqtSignal, QTimer, QPointF, QEvent,
+                          QObject, QRunnable, QThreadPool, QSize)
+from PyQt5.QtGui import QPen, QBrush, QColor, QFont, QPainter, QPixmap, QPolygonF, QPainterPath, QPainterPathStroker, QTransform, QTextCursor
+from pylatex import Document, TikZ, Command, NoEscape
 from pylatex.tikz import TikZNode, TikZDraw
 
 
 from rulers import RulerManager
 from toolbar.app_toolbar import HorizontalActionsToolbar
 
+# TikZ shape names for each gate type (built once at import)
+TIKZ_GATE_NAMES = {
+    "AND": "and gate US", "OR": "or gate US", "NOT": "not gate US",
+    "NAND": "nand gate US", "NOR": "nor gate US", "XOR": "xor gate US",
+    "XNOR": "xnor gate US"
+}
+
+# Shared pens/brushes so paint and hover handlers don't allocate new ones
+_GATE_PEN = QPen(QColor(0, 0, 0), 2)
+_GATE_PEN_SELECTED = QPen(QColor(255, 0, 0), 2)
+_GATE_BRUSH = QBrush(QColor(255, 255, 255))
+_WIRE_PEN = QPen(QColor(0, 0, 0), 2)
+_WIRE_PEN_SELECTED = QPen(QColor(255, 0, 0), 3)
+_PREVIEW_WIRE_PEN = QPen(QColor(100, 100, 100), 2, Qt.DashLine)
+_PIN_PEN = QPen(QColor(100, 100, 100), 1)
+_PIN_PEN_HOVER = QPen(QColor(0, 200, 0), 2)
+_PIN_BRUSH = QBrush(QColor(200, 200, 200))
+_PIN_BRUSH_HOVER = QBrush(QColor(100, 255, 100))
+_JUNCTION_PEN = QPen(QColor(0, 0, 0), 2)
+_JUNCTION_BRUSH = QBrush(QColor(0, 0, 0))
+_JUNCTION_BRUSH_HOVER = QBrush(QColor(100, 100, 100))
+_GRID_PEN = QPen(QColor(200, 200, 200), 0.5)
+
+# (cos, sin) for the right-angle rotations a gate can take
+_QUARTER_TURN_COS_SIN = {0: (1, 0), 90: (0, 1), 180: (-1, 0), 270: (0, -1)}
+
+# Wire tool hit testing: pins are bucketed into square cells of this size
+_PIN_CELL_SIZE = 20
+_PIN_HIT_RADIUS = 6
+
+# Gates, pins and junctions are rasterized once and blitted until they change;
+# set to QGraphicsItem.NoCache to compare against plain repaints
+_ITEM_CACHE_MODE = QGraphicsItem.DeviceCoordinateCache
+
+
+@functools.lru_cache(maxsize=64)
+def _gate_node_options(gate_type, num_inputs):
+    """TikZ node options shared by every gate of the same type and input count"""
+    gate_name = TIKZ_GATE_NAMES.get(gate_type, "and gate US")
+    inputs_spec = f", inputs={num_inputs}" if num_inputs > 2 else ""
+    return f"{gate_name}, draw{inputs_spec}"
+
+
 class CircuitCanvas(QGraphicsView):
     """Enhanced canvas with better connection handling"""
     
+    scene_changed = pyqtSignal()  # Emitted whenever the circuit is edited
+    ruler_manager = None  # Set in __init__; None only while constructing
+    
     def __init__(self):
         super().__init__()
         self.scene = QGraphicsScene()
+        # Gates, junctions and wires move constantly while editing; a linear
+        # item list is cheaper than rebalancing the BSP tree on every move
+        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
         self.setScene(self.scene)
         
         # Set up the view
         self.setDragMode(QGraphicsView.RubberBandDrag)
         self.setRenderHint(QPainter.Antialiasing)
+        # Many small items move at once while dragging; repainting the whole
+        # viewport is cheaper than working out the dirty region for each
+        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
         
         # Drawing state
         self.current_tool = "select"
@@ -38,53 +93,90 @@ class CircuitCanvas(QGraphicsView):
         # Set scene size
         self.scene.setSceneRect(-500, -500, 1000, 1000)
         
+        # current_tool -> mouse press handler(event, scene_pos)
+        self._tool_handlers = {"select": self._on_select_press, "wire": self._on_wire_press}
+        for gate_type in ("AND", "OR", "NOT", "NAND", "NOR", "XOR", "XNOR"):
+            inputs = 1 if gate_type == "NOT" else 2
+            self._tool_handlers[gate_type] = functools.partial(self._on_gate_press, gate_type, inputs)
+        
         # Enable mouse tracking for preview wire
         self.setMouseTracking(True)
-
-        self.shift_pressed = False
-        self.shift_ctrl_pressed = False
+        
+        # Mouse moves can arrive far faster than frames; the preview wire
+        # follows the latest position at most once every 16 ms
+        self._pending_preview_pos = None
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(16)
+        self._preview_timer.timeout.connect(self._apply_preview_pos)
 
         self.grid_size = 25  
+        self._inv_grid = 1.0 / self.grid_size # Snapping multiplies instead of dividing
         self.snap_to_grid_enabled = True  # Renamed to avoid conflict
         self.show_grid = True
+        self._grid_tile = None  # One grid cell, built lazily on first paint
         
         self.ruler_manager = RulerManager(self)
         self.rulers_enabled = True
 
+        # Bumped on every circuit edit so generated TikZ can be reused
+        self._scene_revision = 0
+        self._tikz_cache = None  # (revision, code)
+        self._ir_cache = None  # (revision, (gate_lines, junction_lines, wire_lines))
+
+        # Circuit items by kind, in the order they joined the scene. Dicts
+        # used as ordered sets; items keep them current from itemChange
+        self._gates = {}
+        self._junctions = {}
+        self._wires = {}
+
+        # Connection points and junctions by grid cell, for wire tool clicks
+        self._pins_by_cell = defaultdict(set)
+        self._pin_cells = {}  # pin -> cell it is filed under
+
     def drawBackground(self, painter, rect):
         """Draw grid background"""
         if self.show_grid:
-            painter.setPen(QPen(QColor(200, 200, 200), 0.5))
+            if self._grid_tile is None:
+                self._rebuild_grid_tile()
             
-            # Draw vertical lines
-            left = int(rect.left()) - (int(rect.left()) % self.grid_size)
-            top = int(rect.top()) - (int(rect.top()) % self.grid_size)
-            
-            lines = []
-            x = left
-            while x < rect.right():
-                lines.append(QLineF(x, rect.top(), x, rect.bottom()))
-                x += self.grid_size
-                
-            # Draw horizontal lines
-            y = top
-            while y < rect.bottom():
-                lines.append(QLineF(rect.left(), y, rect.right(), y))
-                y += self.grid_size
-                
-            painter.drawLines(lines)
+            # Start the tiling on a grid line so the tiles line up with the scene grid
+            gs = self.grid_size
+            left = math.floor(rect.left() / gs) * gs
+            top = math.floor(rect.top() / gs) * gs
+            aligned = QRectF(left, top, rect.right() - left, rect.bottom() - top)
+            painter.drawTiledPixmap(aligned, self._grid_tile)
         
         super().drawBackground(painter, rect)
+
+    def _rebuild_grid_tile(self):
+        """Render one grid cell, tiled across the background on paint"""
+        self._grid_tile = QPixmap(self.grid_size, self.grid_size)
+        self._grid_tile.fill(Qt.transparent)
+        tile_painter = QPainter(self._grid_tile)
+        tile_painter.setRenderHint(QPainter.Antialiasing)
+        tile_painter.setPen(_GRID_PEN)
+        # The antialiased lines straddle the cell border, so draw both edges
+        # to get both halves of each line into the tile
+        gs = self.grid_size
+        for offset in (0, gs):
+            tile_painter.drawLine(QPointF(offset, 0), QPointF(offset, gs))
+        for offset in (0, gs):
+            tile_painter.drawLine(QPointF(0, offset), QPointF(gs, offset))
+        tile_painter.end()
         
     def snap_position_to_grid(self, pos):
+        guide_snap = self.ruler_manager and self.ruler_manager.is_guide_snap_enabled()
+        if not (self.snap_to_grid_enabled or guide_snap):
+            return pos # Neither grid nor guide snapping is on
+        
         # First snap to grid if enabled
         if self.snap_to_grid_enabled:
-            x = round(pos.x() / self.grid_size) * self.grid_size
-            y = round(pos.y() / self.grid_size) * self.grid_size
-            pos = QPointF(x, y)
+            gs, inv = self.grid_size, self._inv_grid
+            pos = QPointF(round(pos.x() * inv) * gs, round(pos.y() * inv) * gs)
         
         # Then snap to guides if enabled and ruler_manager exists
-        if hasattr(self, 'ruler_manager') and self.ruler_manager:
+        if self.ruler_manager:
             pos = self.ruler_manager.get_snap_position(pos)
         
         return pos
@@ -103,113 +195,204 @@ class CircuitCanvas(QGraphicsView):
         if self.connecting and self.preview_wire:
             self.scene.removeItem(self.preview_wire)
             self.preview_wire = None
+        self._preview_timer.stop()
+        self._pending_preview_pos = None
         self.connecting = False
         self.start_connection_point = None
     
     def mousePressEvent(self, event):
-        if self.current_tool == "select":
-            super().mousePressEvent(event)
-        elif self.current_tool == "wire":
-            if event.button() == Qt.LeftButton:
-                # Check if we clicked on a connection point or junction
-                item = self.itemAt(event.pos())
-                scene_pos = self.mapToScene(event.pos())
-                
-                if isinstance(item, (ConnectionPoint, JunctionPoint)):
-                    if not self.connecting:
-                        # Start connection
-                        self.start_connection_point = item
-                        self.connecting = True
-                        # Create preview wire
-                        initial_pos = item.get_scene_pos()
-                        self.preview_wire = PreviewWire(item, initial_pos)
-                        self.scene.addItem(self.preview_wire)
-                    else:
-                        # Complete connection
-                        if item != self.start_connection_point:
-                            if self.is_valid_connection(self.start_connection_point, item):
-                                wire = WireItem(self.start_connection_point, item)
-                                self.scene.addItem(wire)
-                        
-                        self.cancel_connection()
-                elif self.connecting:
-                    start_pos = self.start_connection_point.get_scene_pos()
-                    # Create junction at mouse position
-                    if self.shift_pressed:
-                        dx = scene_pos.x() - start_pos.x()
-                        dy = scene_pos.y() - start_pos.y()
-                        if abs(dx) > abs(dy):
-                            #temp_pos_for_x_snap = QPointF(scene_pos.x(), start_pos.y())
-                            #snapped_temp_pos = self.snap_position_to_grid(temp_pos_for_x_snap)
-                            final_junction_pos = QPointF(scene_pos.x(), start_pos.y())
-                            if self.shift_ctrl_pressed:
-                                final_junction_pos = self.snap_position_to_grid(final_junction_pos)
-
-                        else:
-                            #temp_pos_for_y_snap = QPointF(start_pos.x(), scene_pos.y())
-                            #snapped_pos = self.snap_position_to_grid(scene_pos)
-                            final_junction_pos = QPointF(start_pos.x(), scene_pos.y())                            
-                            if self.shift_ctrl_pressed:
-                                final_junction_pos = self.snap_position_to_grid(final_junction_pos)
-                
-                        junction = JunctionPoint(final_junction_pos.x(), final_junction_pos.y())
-                    
-                    # elif self.shift_ctrl_pressed:
-                    #     # start_pos = self.start_connection_point.scenePos()
-                    #     dx = scene_pos.x() - start_pos.x()
-                    #     dy = scene_pos.y() - start_pos.y()
-                    #     if abs(dx) > abs(dy):
-                    #         junction_pos = QPointF(scene_pos.x(), start_pos.y())
-                    #     else:
-                    #         junction_pos = QPointF(start_pos.x(), scene_pos.y())
-                        
-                    #     junction_pos = self.snap_position_to_grid(junction_pos)
-                    #     junction = JunctionPoint(junction_pos.x(), junction_pos.y())
+        handler = self._tool_handlers.get(self.current_tool)
+        if handler is not None:
+            handler(event, self.mapToScene(event.pos()))
 
-                    else:
-                        snapped_pos = scene_pos
-                        junction = JunctionPoint(snapped_pos.x(), snapped_pos.y())
-                            
-                    self.scene.addItem(junction)
-                    
-                    # Connect start point to junction
-                    wire1 = WireItem(self.start_connection_point, junction)
-                    self.scene.addItem(wire1)
-                    
-                    # Start new connection from junction
-                    self.start_connection_point = junction
-                    if self.preview_wire:
-                        self.scene.removeItem(self.preview_wire)
-                    snapped_mouse_pos_for_preview = self.snap_position_to_grid(scene_pos)
-                    self.preview_wire = PreviewWire(junction, snapped_mouse_pos_for_preview)
+    def _on_select_press(self, event, scene_pos):
+        super().mousePressEvent(event)
+
+    def _on_wire_press(self, event, scene_pos):
+        if event.button() == Qt.LeftButton:
+            # Check if we clicked on a connection point or junction
+            item = self.pin_at(scene_pos)
+            
+            if isinstance(item, (ConnectionPoint, JunctionPoint)):
+                if not self.connecting:
+                    # Start connection
+                    self.start_connection_point = item
+                    self.connecting = True
+                    # Create preview wire
+                    self.preview_wire = PreviewWire(item, item.get_scene_pos())
                     self.scene.addItem(self.preview_wire)
                 else:
-                    # Cancel connection if clicking elsewhere
+                    # Complete connection
+                    if item != self.start_connection_point:
+                        if self.is_valid_connection(self.start_connection_point, item):
+                            wire = WireItem(self.start_connection_point, item)
+                            self.add_wire(wire)
+                            self.mark_scene_dirty()
+                    
                     self.cancel_connection()
-            elif event.button() == Qt.RightButton:
-                # Right click cancels connection
+            elif self.connecting:
+                start_pos = self.start_connection_point.get_scene_pos()
+                modifiers = event.modifiers()
+                # Create junction at mouse position
+                if modifiers & Qt.ShiftModifier:
+                    dx = scene_pos.x() - start_pos.x()
+                    dy = scene_pos.y() - start_pos.y()
+                    if abs(dx) > abs(dy):
+                        #temp_pos_for_x_snap = QPointF(scene_pos.x(), start_pos.y())
+                        #snapped_temp_pos = self.snap_position_to_grid(temp_pos_for_x_snap)
+                        final_junction_pos = QPointF(scene_pos.x(), start_pos.y())
+                        if modifiers & Qt.ControlModifier:
+                            final_junction_pos = self.snap_position_to_grid(final_junction_pos)
+
+                    else:
+                        #temp_pos_for_y_snap = QPointF(start_pos.x(), scene_pos.y())
+                        #snapped_pos = self.snap_position_to_grid(scene_pos)
+                        final_junction_pos = QPointF(start_pos.x(), scene_pos.y())                            
+                        if modifiers & Qt.ControlModifier:
+                            final_junction_pos = self.snap_position_to_grid(final_junction_pos)
+            
+                    junction = JunctionPoint(final_junction_pos.x(), final_junction_pos.y())
+                
+                else:
+                    snapped_pos = scene_pos
+                    junction = JunctionPoint(snapped_pos.x(), snapped_pos.y())
+                        
+                self.add_junction(junction)
+                
+                # Connect start point to junction
+                wire1 = WireItem(self.start_connection_point, junction)
+                self.add_wire(wire1)
+                self.mark_scene_dirty()
+                
+                # Start new connection from junction
+                self.start_connection_point = junction
+                if self.preview_wire:
+                    self.scene.removeItem(self.preview_wire)
+                snapped_mouse_pos_for_preview = self.snap_position_to_grid(scene_pos)
+                self.preview_wire = PreviewWire(junction, snapped_mouse_pos_for_preview)
+                self.scene.addItem(self.preview_wire)
+            else:
+                # Cancel connection if clicking elsewhere
                 self.cancel_connection()
-        
-        # Fixed: Gate placement logic moved out of wire tool block
-        elif self.current_tool in ["AND", "OR", "NOT", "NAND", "NOR", "XOR", "XNOR"]:
-            if event.button() == Qt.LeftButton:
-                scene_pos = self.mapToScene(event.pos())
-                # Snap to grid
-                snapped_pos = self.snap_position_to_grid(scene_pos)
-                inputs = 1 if self.current_tool == "NOT" else 2
-                gate = GateItem(self.current_tool, snapped_pos.x(), snapped_pos.y(), inputs)
-                self.scene.addItem(gate)
+        elif event.button() == Qt.RightButton:
+            # Right click cancels connection
+            self.cancel_connection()
+
+    def _on_gate_press(self, gate_type, inputs, event, scene_pos):
+        if event.button() == Qt.LeftButton:
+            # Snap to grid
+            snapped_pos = self.snap_position_to_grid(scene_pos)
+            gate = GateItem(gate_type, snapped_pos.x(), snapped_pos.y(), inputs)
+            self.add_gate(gate)
+            self.mark_scene_dirty()
+
+    def add_gate(self, gate):
+        """Add a gate to the scene"""
+        self.scene.addItem(gate)
+
+    def add_junction(self, junction):
+        """Add a junction to the scene"""
+        self.scene.addItem(junction)
+
+    def add_wire(self, wire):
+        """Add a wire to the scene"""
+        self.scene.addItem(wire)
+
+    def remove_item(self, item):
+        """Remove a gate, junction, wire or other item from the scene"""
+        if item.scene():
+            self.scene.removeItem(item)
+
+    def _registry_for(self, item):
+        if isinstance(item, GateItem):
+            return self._gates
+        if isinstance(item, JunctionPoint):
+            return self._junctions
+        if isinstance(item, WireItem):
+            return self._wires
+        return None
+
+    def register_item(self, item):
+        """Track a gate, junction or wire that joined the scene"""
+        registry = self._registry_for(item)
+        if registry is not None and item not in registry:
+            registry[item] = None
+            self.mark_scene_dirty() # Also covers items added straight to the scene
+
+    def unregister_item(self, item):
+        """Forget a gate, junction or wire that left the scene"""
+        registry = self._registry_for(item)
+        if registry is not None and item in registry:
+            del registry[item]
+            self.mark_scene_dirty()
+
+    def clear_circuit(self):
+        """Remove every gate, junction and wire"""
+        # clear() deletes items without an itemChange, so reset the registries here
+        self.scene.clear()
+        self._gates.clear()
+        self._junctions.clear()
+        self._wires.clear()
+        self.reset_pin_index()
+
+    def mark_scene_dirty(self):
+        """Record that the circuit changed so cached TikZ gets regenerated"""
+        self._scene_revision += 1
+        self.scene_changed.emit()
+
+    def get_scene_revision(self):
+        """Get the current circuit revision counter"""
+        return self._scene_revision
+
+    def _pin_cell(self, scene_pos):
+        return (int(scene_pos.x() // _PIN_CELL_SIZE), int(scene_pos.y() // _PIN_CELL_SIZE))
+
+    def register_pin(self, pin):
+        """File a connection point or junction under its current scene position"""
+        cell = self._pin_cell(pin.get_scene_pos())
+        old_cell = self._pin_cells.get(pin)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self._pins_by_cell[old_cell].discard(pin)
+        self._pins_by_cell[cell].add(pin)
+        self._pin_cells[pin] = cell
+
+    def unregister_pin(self, pin):
+        """Drop a connection point or junction from the hit-test index"""
+        cell = self._pin_cells.pop(pin, None)
+        if cell is not None:
+            self._pins_by_cell[cell].discard(pin)
+
+    def reset_pin_index(self):
+        """Forget all pins, e.g. after the scene was cleared"""
+        self._pins_by_cell.clear()
+        self._pin_cells.clear()
+
+    def pin_at(self, scene_pos):
+        """Get the connection point or junction closest to scene_pos, if any is in reach"""
+        cell_x, cell_y = self._pin_cell(scene_pos)
+        x, y = scene_pos.x(), scene_pos.y()
+        best, best_dist = None, _PIN_HIT_RADIUS * _PIN_HIT_RADIUS
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for pin in self._pins_by_cell.get((cell_x + dx, cell_y + dy), ()):
+                    pos = pin.get_scene_pos()
+                    dist = (pos.x() - x) ** 2 + (pos.y() - y) ** 2
+                    if dist <= best_dist:
+                        best, best_dist = pin, dist
+        return best
 
     def toggle_rulers(self):
-        if hasattr(self, 'ruler_manager') and self.ruler_manager:
+        if self.ruler_manager:
             self.ruler_manager.toggle_rulers()
     
     def clear_guides(self):
-        if hasattr(self, 'ruler_manager') and self.ruler_manager:
+        if self.ruler_manager:
             self.ruler_manager.clear_guides()
         
     def set_guide_snap_enabled(self, enabled):
-        if hasattr(self, 'ruler_manager') and self.ruler_manager:
+        if self.ruler_manager:
             self.ruler_manager.set_guide_snap_enabled(enabled)
 
     # def toggle_grid_snap(self):
@@ -224,143 +407,162 @@ class CircuitCanvas(QGraphicsView):
     def set_grid_size(self, size):
         """Set grid size"""
         self.grid_size = max(5, size)
+        self._inv_grid = 1.0 / self.grid_size
+        self._grid_tile = None
         self.viewport().update()
     
     def mouseMoveEvent(self, event):
         if self.connecting and self.preview_wire:
-            scene_pos = self.mapToScene(event.pos())
-            
-            # Check if shift is pressed for orthogonal routing
-            if self.shift_pressed:
-                start_pos = self.start_connection_point.get_scene_pos()
-                
-                # Calculate orthogonal position
-                dx = scene_pos.x() - start_pos.x()
-                dy = scene_pos.y() - start_pos.y()
-                
-                # Choose the dominant direction
-                if abs(dx) > abs(dy):
-                    # Horizontal first
-                    ortho_pos = QPointF(scene_pos.x(), start_pos.y())
-                else:
-                    # Vertical first  
-                    ortho_pos = QPointF(start_pos.x(), scene_pos.y())
-                
-                self.preview_wire.update_end_pos(ortho_pos)
-            else:
-                self.preview_wire.update_end_pos(scene_pos)
+            self._pending_preview_pos = self.mapToScene(event.pos())
+            if not self._preview_timer.isActive():
+                self._preview_timer.start()
         
         super().mouseMoveEvent(event)
 
+    def _apply_preview_pos(self):
+        """Move the preview wire end to the last mouse position seen"""
+        scene_pos = self._pending_preview_pos
+        self._pending_preview_pos = None
+        if scene_pos is None or not (self.connecting and self.preview_wire):
+            return
+        
+        update_end_pos = self.preview_wire.update_end_pos
+        
+        # Check if shift is pressed for orthogonal routing; this runs off a
+        # timer, so ask for the modifiers held right now
+        if QApplication.keyboardModifiers() & Qt.ShiftModifier:
+            # The pin caches this and drops it when its gate moves or rotates
+            start_pos = self.start_connection_point.get_scene_pos()
+            
+            # Calculate orthogonal position
+            dx = scene_pos.x() - start_pos.x()
+            dy = scene_pos.y() - start_pos.y()
+            
+            # Choose the dominant direction
+            if abs(dx) > abs(dy):
+                # Horizontal first
+                ortho_pos = QPointF(scene_pos.x(), start_pos.y())
+            else:
+                # Vertical first  
+                ortho_pos = QPointF(start_pos.x(), scene_pos.y())
+            
+            update_end_pos(ortho_pos)
+        else:
+            update_end_pos(scene_pos)
+
     def keyPressEvent(self, event):
         """Handle key presses"""
-        # modifiers = 
-
+        # Shift/Ctrl for wire routing are read from the mouse events themselves
         if event.key() == Qt.Key_Escape:
             self.cancel_connection()
-        elif event.key() == Qt.Key_Shift:
-            self.shift_pressed = True
-        # elif (event.modifiers() & Qt.ShiftModifier) and (event.modifiers() & Qt.ControlModifier):
-        elif event.key() == Qt.Key_Control:
-            self.shift_ctrl_pressed = True
         elif event.key() == Qt.Key_G:
             self.toggle_grid_display()  # G key toggles grid display
         # elif event.key() == Qt.Key_S and event.modifiers() == Qt.ControlModifier:
         #     self.toggle_grid_snap()  # Ctrl+S toggles grid snapping
         super().keyPressEvent(event)
 
-    def keyReleaseEvent(self, event):
-        modifiers = event.modifiers()
-
-        if event.key() == Qt.Key_Shift:
-            self.shift_pressed = False
-            # self.shift_ctrl_pressed = False
-
-        elif event.key() == Qt.Key_Control:
-            self.shift_ctrl_pressed = False
-        super().keyReleaseEvent(event)
-
     def is_valid_connection(self, point1, point2):
         """Enhanced connection validation"""
-        if point1 == point2:
+        if point1 is point2:
             return False
         
-        if isinstance(point1, JunctionPoint) or isinstance(point2, JunctionPoint):
+        # Junctions have no point type and take any number of wires
+        if point1.point_type is None or point2.point_type is None:
             return True
         
-        if hasattr(point1, 'point_type') and hasattr(point2, 'point_type'):
-            if point1.point_type == point2.point_type:
-                return False
-        
-        if hasattr(point1, 'parent_gate') and hasattr(point2, 'parent_gate'):
-            if point1.parent_gate == point2.parent_gate:
-                return False
+        if point1.point_type == point2.point_type:
+            return False
         
-        if hasattr(point1, 'point_type') and point1.point_type == 'input' and len(point1.connected_wires) > 0:
+        if point1.parent_gate is point2.parent_gate:
             return False
-        if hasattr(point2, 'point_type') and point2.point_type == 'input' and len(point2.connected_wires) > 0:
+        
+        if point1.input_occupied or point2.input_occupied:
             return False
         
         return True
     
     def get_all_tikz_code(self):
         """Generate TikZ code for all items in the scene"""
-        tikz_code = []
-        tikz_code.append("\\documentclass[tikz, border=15pt]{standalone}")
-        tikz_code.append("\\usetikzlibrary{positioning, shapes.gates.logic.US, calc}")
-        tikz_code.append("\\usepackage{amsmath}")
-        tikz_code.append("\\begin{document}")
-        tikz_code.append("\\begin{tikzpicture}")
-        
-        # Get all items
-        gates = [item for item in self.scene.items() if isinstance(item, GateItem)]
-        junctions = [item for item in self.scene.items() if isinstance(item, JunctionPoint)]
-        wires = [item for item in self.scene.items() if isinstance(item, WireItem)]
-        
-        # Create gate ID mapping
-        gate_id_map = {}
-        for i, gate in enumerate(gates):
-            gate_type_count = len([g for g in gates if g.gate_type == gate.gate_type])
-            if gate_type_count > 1:
-                gate_id = f"{gate.gate_type.lower()}{i+1}"
-            else:
-                gate_id = gate.gate_type.lower()
-            gate_id_map[gate] = gate_id
+        if self._tikz_cache and self._tikz_cache[0] == self._scene_revision:
+            return self._tikz_cache[1]
+
+        code = "\n".join(self.iter_tikz_code())
+        self._tikz_cache = (self._scene_revision, code)
+        return code
+    
+    def iter_tikz_code(self):
+        """Yield the TikZ document for the scene line by line"""
+        gate_lines, junction_lines, wire_lines = self._collect_circuit_ir()
         
-        # Create junction ID mapping
-        junction_id_map = {}
-        for i, junction in enumerate(junctions):
-            junction_id_map[junction] = f"junction{i+1}"
+        yield "\\documentclass[tikz, border=15pt]{standalone}"
+        yield "\\usetikzlibrary{positioning, shapes.gates.logic.US, calc}"
+        yield "\\usepackage{amsmath}"
+        yield "\\begin{document}"
+        yield "\\begin{tikzpicture}"
         
         # Add gates section
-        if gates:
-            tikz_code.append("    % Gates")
-            for gate in gates:
-                gate_id = gate_id_map[gate]
-                tikz_code.append(gate.get_tikz_code(gate_id))
+        if gate_lines:
+            yield "    % Gates"
+            yield from gate_lines
         
         # Add junctions section
-        if junctions:
-            tikz_code.append("    ")
-            tikz_code.append("    % Junctions")
-            for junction in junctions:
-                junction_id = junction_id_map[junction]
-                tikz_code.append(junction.get_tikz_code(junction_id))
+        if junction_lines:
+            yield "    "
+            yield "    % Junctions"
+            yield from junction_lines
         
         # Add connections section
-        if wires:
-            tikz_code.append("    ")
-            tikz_code.append("    % Connections")
-            for wire in wires:
-                if wire.start_connection and wire.end_connection:
-                    start_ref = self.get_connection_reference(wire.start_connection, gate_id_map, junction_id_map)
-                    end_ref = self.get_connection_reference(wire.end_connection, gate_id_map, junction_id_map)
-                    if start_ref and end_ref:
-                        tikz_code.append(wire.get_tikz_code(start_ref, end_ref))
-        
-        tikz_code.append("\\end{tikzpicture}")
-        tikz_code.append("\\end{document}")
-        return "\n".join(tikz_code)
+        if wire_lines:
+            yield "    "
+            yield "    % Connections"
+            yield from wire_lines
+        
+        yield "\\end{tikzpicture}"
+        yield "\\end{document}"
+    
+    def _collect_circuit_ir(self):
+        """Collect the TikZ lines for gates, junctions and wires in the scene"""
+        if self._ir_cache and self._ir_cache[0] == self._scene_revision:
+            return self._ir_cache[1]
+        
+        # Registries are filled from itemChange, so items added straight to the scene count too
+        gates, junctions, wires = list(self._gates), list(self._junctions), list(self._wires)
+        
+        # Create ID mappings
+        gate_id_map = self._assign_gate_ids(gates)
+        
+        junction_id_map = {}
+        for i, junction in enumerate(junctions):
+            junction_id_map[junction] = f"junction{i+1}"
+        
+        gate_lines = [gate.get_tikz_code(gate_id_map[gate]) for gate in gates]
+        junction_lines = [junction.get_tikz_code(junction_id_map[junction]) for junction in junctions]
+        
+        wire_lines = []
+        for wire in wires:
+            if wire.start_connection and wire.end_connection:
+                start_ref = self.get_connection_reference(wire.start_connection, gate_id_map, junction_id_map)
+                end_ref = self.get_connection_reference(wire.end_connection, gate_id_map, junction_id_map)
+                if start_ref and end_ref:
+                    wire_lines.append(wire.get_tikz_code(start_ref, end_ref))
+        
+        ir = (gate_lines, junction_lines, wire_lines)
+        self._ir_cache = (self._scene_revision, ir)
+        return ir
+    
+    def _assign_gate_ids(self, gates):
+        """Map each gate to a unique TikZ node name in one pass"""
+        totals = Counter(gate.gate_type for gate in gates)
+        seen = defaultdict(int)
+        gate_id_map = {}
+        for gate in gates:
+            base = gate.gate_type.lower()
+            if totals[gate.gate_type] > 1:
+                seen[gate.gate_type] += 1
+                gate_id_map[gate] = f"{base}{seen[gate.gate_type]}"
+            else:
+                gate_id_map[gate] = base
+        return gate_id_map
     
     def get_connection_reference(self, connection, gate_id_map, junction_id_map):
         """Get TikZ reference for a connection point"""
@@ -388,123 +590,122 @@ class CircuitCanvas(QGraphicsView):
         doc.packages.append(Command('usetikzlibrary', 'positioning, shapes.gates.logic.US, calc'))
         doc.packages.append(Command('usepackage', 'amsmath'))
         
-        # Get all items
-        gates = [item for item in self.scene.items() if isinstance(item, GateItem)]
-        junctions = [item for item in self.scene.items() if isinstance(item, JunctionPoint)]
-        wires = [item for item in self.scene.items() if isinstance(item, WireItem)]
-        
-        # Create ID mappings
-        gate_id_map = {}
-        for i, gate in enumerate(gates):
-            gate_type_count = len([g for g in gates if g.gate_type == gate.gate_type])
-            if gate_type_count > 1:
-                gate_id = f"{gate.gate_type.lower()}{i+1}"
-            else:
-                gate_id = gate.gate_type.lower()
-            gate_id_map[gate] = gate_id
-        
-        junction_id_map = {}
-        for i, junction in enumerate(junctions):
-            junction_id_map[junction] = f"junction{i+1}"
+        gate_lines, junction_lines, wire_lines = self._collect_circuit_ir()
         
         with doc.create(TikZ()) as tikz:
-            # Add gates
-            for gate in gates:
-                gate_id = gate_id_map[gate]
-                x, y = gate.pos().x() / 50, -gate.pos().y() / 50 # TikZ uses a different y-axis direction
-                
-                tikz_gates = {
-                    "AND": "and gate US",
-                    "OR": "or gate US", 
-                    "NOT": "not gate US",
-                    "NAND": "nand gate US",
-                    "NOR": "nor gate US",
-                    "XOR": "xor gate US",
-                    "XNOR": "xnor gate US"
-                }
-                
-                gate_name = tikz_gates.get(gate.gate_type, "and gate US")
-                inputs_spec = f", inputs={gate.num_inputs}" if gate.num_inputs >= 2 else ""
-             
-                tikz_rotation_angle = gate.angle
-                if gate.angle == 90:
-                    tikz_rotation_angle = 360-90
-                elif gate.angle == 270:
-                    tikz_rotation_angle = 360-270
-                
-                rotation_spec = f", rotate={gate.angle}" if gate.angle != 0 else ""
-                             
-                tikz.append(Command('node', 
-                                  options=[f'{gate_name}, draw{inputs_spec}{rotation_spec}'],
-                                  arguments=[f'({gate_id})'],
-                                  extra_arguments=f'at ({x:.2f}, {y:.2f}) {{}}'))
-            
-            # Add junctions
-            for junction in junctions:
-                junction_id = junction_id_map[junction]
-                x, y = junction.pos().x() / 50, -junction.pos().y() / 50
-                tikz.append(Command('node', 
-                                  options=['circle, fill, inner sep=1pt'],
-                                  arguments=[f'({junction_id})'],
-                                  extra_arguments=f'at ({x:.2f}, {y:.2f}) {{}}'))
+            # Add gates and junctions as one raw block, reusing the same
+            # node lines as the code viewer instead of a Command per node
+            node_lines = gate_lines + junction_lines
+            if node_lines:
+                tikz.append(NoEscape("\n".join(node_lines)))
             
-            # Add connections
-            for wire in wires:
-                if wire.start_connection and wire.end_connection:
-                    start_ref = self.get_connection_reference(wire.start_connection, gate_id_map, junction_id_map)
-                    end_ref = self.get_connection_reference(wire.end_connection, gate_id_map, junction_id_map)
-                    if start_ref and end_ref:
-                        tikz.append(Command('draw', arguments=[f'({start_ref}) -- ({end_ref})']))
+            # Add connections, also as a single raw block
+            if wire_lines:
+                tikz.append(NoEscape("\n".join(wire_lines)))
         
         return doc
 
+def _canvas_for(scene):
+    """Get the circuit canvas showing a scene, if any"""
+    if scene is None:
+        return None
+    for view in scene.views():
+        if isinstance(view, CircuitCanvas):
+            return view
+    return None
+
+def _mark_scene_dirty(item):
+    """Tell the canvas showing this item that the circuit changed"""
+    canvas = _canvas_for(item.scene())
+    if canvas is not None:
+        canvas.mark_scene_dirty()
+
+def _update_item_registry(item, change):
+    """Keep the canvas gate/junction/wire registries in step with the scene"""
+    if change == QGraphicsItem.ItemSceneChange:
+        canvas = _canvas_for(item.scene()) # Still the old scene here
+        if canvas is not None:
+            canvas.unregister_item(item)
+    elif change == QGraphicsItem.ItemSceneHasChanged:
+        canvas = _canvas_for(item.scene())
+        if canvas is not None:
+            canvas.register_item(item)
+
+def _update_pin_index(pin, change):
+    """Keep the canvas pin index in step with a pin leaving, joining or moving"""
+    if change == QGraphicsItem.ItemSceneChange:
+        canvas = _canvas_for(pin.scene()) # Still the old scene here
+        if canvas is not None:
+            canvas.unregister_pin(pin)
+    elif change in (QGraphicsItem.ItemSceneHasChanged, QGraphicsItem.ItemPositionHasChanged):
+        canvas = _canvas_for(pin.scene())
+        if canvas is not None:
+            canvas.register_pin(pin)
+
+
 class JunctionPoint(QGraphicsEllipseItem):
     """Junction point for splitting connections"""
     
     def __init__(self, x, y):
         super().__init__(-4, -4, 8, 8)  # Slightly larger than connection points
+        self._scene_pos_cache = None # Cleared when the junction moves
         self.setPos(x, y)
         
         # Style - filled black circle
-        self.setPen(QPen(QColor(0, 0, 0), 2))
-        self.setBrush(QBrush(QColor(0, 0, 0)))
+        self.setPen(_JUNCTION_PEN)
+        self.setBrush(_JUNCTION_BRUSH)
         
         # Make it movable and selectable
         self.setFlag(QGraphicsItem.ItemIsMovable, True)
         self.setFlag(QGraphicsItem.ItemIsSelectable, True)
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges, True)
         self.setAcceptHoverEvents(True)
+        self.setCacheMode(_ITEM_CACHE_MODE)
         
         # Connected wires
-        self.connected_wires = []
+        self.connected_wires = set()
+        
+        # Same attributes as ConnectionPoint so callers can read them directly
+        self.point_type = None
+        self.parent_gate = None
+        self.index = -1
+        self.input_occupied = False
+        
+        self._tikz_line = None  # (junction_id, line), cleared on move
         
     def hoverEnterEvent(self, event):
-        self.setBrush(QBrush(QColor(100, 100, 100)))
+        self.setBrush(_JUNCTION_BRUSH_HOVER)
         super().hoverEnterEvent(event)
         
     def hoverLeaveEvent(self, event):
-        self.setBrush(QBrush(QColor(0, 0, 0)))
+        self.setBrush(_JUNCTION_BRUSH)
         super().hoverLeaveEvent(event)
     
     def get_scene_pos(self):
         """Get the absolute scene position of this junction point"""
         # return self.mapToScene(self.boundingRect().center())
-        return self.mapToScene(QPointF(0, 0))
+        if self._scene_pos_cache is None:
+            self._scene_pos_cache = self.mapToScene(QPointF(0, 0))
+        return self._scene_pos_cache
     
     def add_wire(self, wire):
         """Add a wire connected to this point"""
-        self.connected_wires.append(wire)
+        self.connected_wires.add(wire)
     
     def remove_wire(self, wire):
         """Remove a wire from this point"""
-        if wire in self.connected_wires:
-            self.connected_wires.remove(wire)
+        self.connected_wires.discard(wire)
     
     def itemChange(self, change, value):
         """Handle item changes (like position changes)"""
-        if change == QGraphicsItem.ItemPositionChange:
-            # Update connected wires when junction moves
+        if change == QGraphicsItem.ItemPositionHasChanged:
+            # Update connected wires once the junction has moved
+            self._scene_pos_cache = None
             self.update_connected_wires()
+            self._tikz_line = None
+            _mark_scene_dirty(self)
+        _update_pin_index(self, change)
+        _update_item_registry(self, change)
         return super().itemChange(change, value)
     
     def update_connected_wires(self):
@@ -514,8 +715,12 @@ class JunctionPoint(QGraphicsEllipseItem):
     
     def get_tikz_code(self, junction_id):
         """Generate TikZ code for this junction"""
+        if self._tikz_line and self._tikz_line[0] == junction_id:
+            return self._tikz_line[1]
         x, y = self.pos().x() / 50, -self.pos().y() / 50
-        return f"    \\node[circle, fill, inner sep=1pt] ({junction_id}) at ({x:.2f}, {y:.2f}) {{}};"
+        line = f"    \\node[circle, fill, inner sep=1pt] ({junction_id}) at ({x:.2f}, {y:.2f}) {{}};"
+        self._tikz_line = (junction_id, line)
+        return line
 
 
 class ConnectionPoint(QGraphicsEllipseItem):
@@ -523,6 +728,7 @@ class ConnectionPoint(QGraphicsEllipseItem):
     
     def __init__(self, parent_gate, point_type, index, x, y):
         super().__init__(-3, -3, 6, 6)  # Small circle
+        self._scene_pos_cache = None # Cleared by the parent gate when it moves
         self.parent_gate = parent_gate
         self.point_type = point_type  # 'input' or 'output'
         self.index = index
@@ -530,43 +736,113 @@ class ConnectionPoint(QGraphicsEllipseItem):
         self.setParentItem(parent_gate)
         
         # Style
-        self.setPen(QPen(QColor(100, 100, 100), 1))
-        self.setBrush(QBrush(QColor(200, 200, 200)))
+        self.setPen(_PIN_PEN)
+        self.setBrush(_PIN_BRUSH)
         
         # Make it hoverable
         self.setAcceptHoverEvents(True)
         self.setFlag(QGraphicsItem.ItemIsSelectable, False)
+        self.setCacheMode(_ITEM_CACHE_MODE)
         
         # Connected wires
-        self.connected_wires = []
+        self.connected_wires = set()
+        self.input_occupied = False # An input already driven by a wire
         
     def hoverEnterEvent(self, event):
-        self.setBrush(QBrush(QColor(100, 255, 100)))
-        self.setPen(QPen(QColor(0, 200, 0), 2))
+        self.setBrush(_PIN_BRUSH_HOVER)
+        self.setPen(_PIN_PEN_HOVER)
         super().hoverEnterEvent(event)
         
     def hoverLeaveEvent(self, event):
-        self.setBrush(QBrush(QColor(200, 200, 200)))
-        self.setPen(QPen(QColor(100, 100, 100), 1))
+        self.setBrush(_PIN_BRUSH)
+        self.setPen(_PIN_PEN)
         super().hoverLeaveEvent(event)
     
     def get_scene_pos(self):
         """Get the absolute scene position of this connection point"""
-        return self.mapToScene(self.boundingRect().center())
+        if self._scene_pos_cache is None:
+            self._scene_pos_cache = self.mapToScene(self.boundingRect().center())
+        return self._scene_pos_cache
+    
+    def invalidate_scene_pos(self):
+        """Forget the cached scene position after the parent gate moved"""
+        self._scene_pos_cache = None
+    
+    def itemChange(self, change, value):
+        """Track joining/leaving the scene along with the parent gate"""
+        _update_pin_index(self, change)
+        return super().itemChange(change, value)
     
     def add_wire(self, wire):
         """Add a wire connected to this point"""
-        self.connected_wires.append(wire)
+        self.connected_wires.add(wire)
+        self.input_occupied = self.point_type == 'input'
     
     def remove_wire(self, wire):
         """Remove a wire from this point"""
-        if wire in self.connected_wires:
-            self.connected_wires.remove(wire)
+        self.connected_wires.discard(wire)
+        self.input_occupied = self.point_type == 'input' and bool(self.connected_wires)
+
+
+def _and_gate_path(width, height):
+    """Build AND gate shape"""
+    path = QPainterPath()
+    path.moveTo(0, -height/2)
+    path.lineTo(width/2, -height/2)
+    path.arcTo(width/2 - height/2, -height/2, height, height, 90, -180)
+    path.lineTo(0, height/2)
+    path.closeSubpath()
+    return path
+
+def _or_gate_path(width, height):
+    """Build OR gate shape"""
+    path = QPainterPath()
+    path.moveTo(0, -height/2)
+    path.quadTo(width/4, -height/4, width/4, 0) # Inner curve control point 1
+    path.quadTo(width/4, height/4, 0, height/2)  # Inner curve control point 2
+    
+    path.quadTo(width * 0.6, height/2 * 0.7, width, 0) # Top outer curve
+    path.quadTo(width * 0.6, -height/2 * 0.7, 0, -height/2) # Bottom outer curve
+    return path
+
+def _xor_gate_path(width, height):
+    """Build XOR gate shape"""
+    path = _or_gate_path(width, height) # OR shape first
+    
+    arc_x_offset = -8
+    path.moveTo(arc_x_offset, -height/2)
+    path.quadTo(arc_x_offset + width/8, -height/4, arc_x_offset + width/8, 0)
+    path.quadTo(arc_x_offset + width/8, height/4, arc_x_offset, height/2)
+    return path
+
+def _not_gate_path(width, height):
+    """Build NOT gate triangle (the circle is drawn separately)"""
+    triangle = QPolygonF([
+        QPointF(0, -height/2 * 0.6), # Make triangle a bit smaller
+        QPointF(0, height/2 * 0.6),
+        QPointF(width - 10, 0) # Point of triangle before circle
+    ])
+    path = QPainterPath()
+    path.addPolygon(triangle)
+    path.closeSubpath()
+    return path
 
 
 class GateItem(QGraphicsItem):
     """Custom graphics item for logic gates with proper shapes"""
     
+    # gate type -> (outline builder, distance of the negation bubble from the right edge)
+    _SHAPE_BUILDERS = {
+        "AND": (_and_gate_path, None),
+        "NAND": (_and_gate_path, 0),
+        "OR": (_or_gate_path, None),
+        "NOR": (_or_gate_path, 0),
+        "XOR": (_xor_gate_path, None),
+        "XNOR": (_xor_gate_path, 0),
+        "NOT": (_not_gate_path, 10), # Circle at output of triangle
+    }
+    _path_cache = {} # (gate_type, width, height) -> (path, negation x or None)
+    
     def __init__(self, gate_type, x, y, inputs=2):
         super().__init__()
         self.gate_type = gate_type
@@ -582,26 +858,43 @@ class GateItem(QGraphicsItem):
         self.width = 80
         self.height = 60
         self.angle = 0 # Angle for rotation
+        self._tikz_line = None # (gate_id, line), cleared on move/rotate
+        self._cached_brect = None # Rotated bounds, cleared on rotate
         
         # Connection points
         self.input_points = []
         self.output_points = []
+        self._point_pool = [] # Reused by create_connection_points
         
         self.create_connection_points()
         
+        # Unrotated body outline and output bubble x, shared by same-sized gates
+        self._painter_path, self._negation_x = self.shape_for(gate_type, self.width, self.height)
+        
+        self.setCacheMode(_ITEM_CACHE_MODE)
+        
+    @classmethod
+    def shape_for(cls, gate_type, width, height):
+        """Get the (body path, negation bubble x) for a gate type and size"""
+        key = (gate_type, width, height)
+        shape = cls._path_cache.get(key)
+        if shape is None:
+            builder, bubble_offset = cls._SHAPE_BUILDERS.get(gate_type, (None, None))
+            path = builder(width, height) if builder else QPainterPath()
+            negation_x = width - bubble_offset if bubble_offset is not None else None
+            shape = cls._path_cache[key] = (path, negation_x)
+        return shape
+    
     def rotate_gate(self):
         self.angle = (self.angle + 90) % 360
+        self._tikz_line = None
         self.prepareGeometryChange() # Notify that geometry is changing
+        self._cached_brect = None
         
-        for point in self.input_points + self.output_points:
-            if point.scene():
-                point.scene().removeItem(point)
-            del point # Ensure cleanup
-        self.input_points.clear()
-        self.output_points.clear()
-        self.create_connection_points()
+        self.create_connection_points() # Moves the existing points, wires stay attached
         self.update_connected_wires() # Wires need to redraw
         self.update() # Request a repaint
+        _mark_scene_dirty(self)
     
     def get_rotation_transform(self):
         """Get the rotation transform used for this gate"""
@@ -612,45 +905,52 @@ class GateItem(QGraphicsItem):
         return transform
 
     def create_connection_points(self):
-        """Create input and output connection points"""
-        # Clear existing points
-        for point in self.input_points + self.output_points:
-            if point.scene():
-                point.scene().removeItem(point)
-        
-        self.input_points = []
-        self.output_points = []
-        
+        """Create input and output connection points, reusing existing ones"""
         transform = self.get_rotation_transform()
 
         input_x_offset = -12 # Was -10
         
-        # Create input points (left side)
+        # Unrotated pin positions, inputs (left side) first
         if self.num_inputs == 2:
             y_positions_for_two_inputs = [-5.0, 5.0]
-            for i in range(self.num_inputs):
-                y_pos = y_positions_for_two_inputs[i]
-                # Apply rotation to the point position
-                original_pos = QPointF(input_x_offset, y_pos)
-                rotated_pos = transform.map(original_pos)
-                point = ConnectionPoint(self, 'input', i, rotated_pos.x(), rotated_pos.y())
-                self.input_points.append(point)
+            original_positions = [QPointF(input_x_offset, y_pos) for y_pos in y_positions_for_two_inputs]
         else:
             input_spacing = self.height / (self.num_inputs + 1)
-            for i in range(self.num_inputs):
-                y_pos = input_spacing * (i + 1) - self.height/2
-
-                original_pos = QPointF(-10, y_pos)
-                rotated_pos = transform.map(original_pos)
-                point = ConnectionPoint(self, 'input', i, rotated_pos.x(), rotated_pos.y())
-                self.input_points.append(point)
-        
-        original_output_pos = QPointF(self.width, 0)
-        rotated_output_pos = transform.map(original_output_pos)
-        output_point = ConnectionPoint(self, 'output', 0, rotated_output_pos.x(), rotated_output_pos.y())
-        self.output_points.append(output_point)
+            original_positions = [QPointF(-10, input_spacing * (i + 1) - self.height/2)
+                                  for i in range(self.num_inputs)]
+        original_positions.append(QPointF(self.width, 0))
+        
+        pool = self._point_pool
+        while len(pool) < len(original_positions):
+            pool.append(ConnectionPoint(self, 'input', len(pool), 0, 0))
+        
+        canvas = _canvas_for(self.scene())
+        for i, original_pos in enumerate(original_positions):
+            point = pool[i]
+            if i < self.num_inputs:
+                point.point_type, point.index = 'input', i
+            else:
+                point.point_type, point.index = 'output', 0
+            # Apply rotation to the point position
+            point.setPos(transform.map(original_pos))
+            point.setVisible(True)
+            point.invalidate_scene_pos()
+            if canvas is not None:
+                canvas.register_pin(point)
+        
+        # Park any leftover points from a larger input count
+        for point in pool[len(original_positions):]:
+            point.setVisible(False)
+            if canvas is not None:
+                canvas.unregister_pin(point)
+        
+        self.input_points = pool[:self.num_inputs]
+        self.output_points = [pool[self.num_inputs]]
 
     def boundingRect(self):
+        # Only depends on size, input count and angle; cleared on rotate
+        if self._cached_brect is not None:
+            return self._cached_brect
         
         core_rect = QRectF(0, -self.height / 2, self.width, self.height)
         
@@ -681,42 +981,30 @@ class GateItem(QGraphicsItem):
             min_y = min(min_y, p.y())
             max_y = max(max_y, p.y())
             
-        # This is the bounding rect of the gate and its pins before rotation, relative to item's (0,0)
-        base_brect = QRectF(min_x, min_y, max_x - min_x, max_y - min_y)
-
-        # # Now, transform this base_brect by the current rotation around (self.width/2, 0)
-        # transform = QTransform()
-        # transform.translate(self.width / 2, 0) # To rotation center
-        # transform.rotate(self.angle)            # Rotate
-        # transform.translate(-self.width / 2, 0) # Back from rotation center
-        
-        transform = self.get_rotation_transform()
-
-        # Map the four corners of the base_brect and find the new min/max
-        p1 = transform.map(base_brect.topLeft())
-        p2 = transform.map(base_brect.topRight())
-        p3 = transform.map(base_brect.bottomLeft())
-        p4 = transform.map(base_brect.bottomRight())
+        # Rotate the corners around (self.width/2, 0), same as get_rotation_transform()
+        cos_a, sin_a = _QUARTER_TURN_COS_SIN[self.angle]
+        cx = self.width / 2
+        xs, ys = [], []
+        for x, y in ((min_x, min_y), (max_x, min_y), (min_x, max_y), (max_x, max_y)):
+            xs.append(cx + cos_a * (x - cx) - sin_a * y)
+            ys.append(sin_a * (x - cx) + cos_a * y)
 
-        final_min_x = min(p1.x(), p2.x(), p3.x(), p4.x())
-        final_max_x = max(p1.x(), p2.x(), p3.x(), p4.x())
-        final_min_y = min(p1.y(), p2.y(), p3.y(), p4.y())
-        final_max_y = max(p1.y(), p2.y(), p3.y(), p4.y())
+        final_min_x, final_max_x = min(xs), max(xs)
+        final_min_y, final_max_y = min(ys), max(ys)
         
         # Add a small padding for selection outlines, etc.
         padding = 5 
-        return QRectF(final_min_x - padding, final_min_y - padding, 
-                      (final_max_x - final_min_x) + 2 * padding, 
-                      (final_max_y - final_min_y) + 2 * padding)
+        self._cached_brect = QRectF(final_min_x - padding, final_min_y - padding, 
+                                    (final_max_x - final_min_x) + 2 * padding, 
+                                    (final_max_y - final_min_y) + 2 * padding)
+        return self._cached_brect
 
     def paint(self, painter, option, widget):
         painter.setRenderHint(QPainter.Antialiasing)
         
-        pen = QPen(QColor(0, 0, 0), 2)
-        if self.isSelected():
-            pen.setColor(QColor(255, 0, 0)) # Highlight selected item
-        painter.setPen(pen)
-        painter.setBrush(QBrush(QColor(255, 255, 255))) # Gate body color
+        # Highlight selected item
+        painter.setPen(_GATE_PEN_SELECTED if self.isSelected() else _GATE_PEN)
+        painter.setBrush(_GATE_BRUSH) # Gate body color
 
         painter.save() # Save painter state
 
@@ -725,70 +1013,12 @@ class GateItem(QGraphicsItem):
         painter.rotate(self.angle)           # Rotate
         painter.translate(-self.width / 2, 0) # Move origin back
 
-        # Draw gate shape based on type
-        if self.gate_type == "AND":
-            self.draw_and_gate(painter)
-        elif self.gate_type == "OR":
-            self.draw_or_gate(painter)
-        elif self.gate_type == "NOT":
-            self.draw_not_gate(painter)
-        elif self.gate_type == "NAND":
-            self.draw_and_gate(painter)
-            self.draw_negation_circle(painter, self.width, 0) # Circle at output
-        elif self.gate_type == "NOR":
-            self.draw_or_gate(painter)
-            self.draw_negation_circle(painter, self.width, 0) # Circle at output
-        elif self.gate_type == "XOR":
-            self.draw_xor_gate(painter)
-        elif self.gate_type == "XNOR":
-            self.draw_xor_gate(painter)
-            self.draw_negation_circle(painter, self.width, 0) # Circle at output
+        painter.drawPath(self._painter_path)
+        if self._negation_x is not None:
+            self.draw_negation_circle(painter, self._negation_x, 0)
         
         painter.restore() # Restore painter state (removes rotation for other items)
 
-    def draw_and_gate(self, painter):
-        """Draw AND gate shape"""
-        path = QPainterPath()
-        path.moveTo(0, -self.height/2)
-        path.lineTo(self.width/2, -self.height/2)
-        path.arcTo(self.width/2 - self.height/2, -self.height/2, self.height, self.height, 90, -180)
-        path.lineTo(0, self.height/2)
-        path.closeSubpath()
-        painter.drawPath(path)
-    
-    def draw_or_gate(self, painter):
-        """Draw OR gate shape"""
-        path = QPainterPath()
-        path.moveTo(0, -self.height/2)
-        path.quadTo(self.width/4, -self.height/4, self.width/4, 0) # Inner curve control point 1
-        path.quadTo(self.width/4, self.height/4, 0, self.height/2)  # Inner curve control point 2
-        
-        path.quadTo(self.width * 0.6, self.height/2 * 0.7, self.width, 0) # Top outer curve
-        path.quadTo(self.width * 0.6, -self.height/2 * 0.7, 0, -self.height/2) # Bottom outer curve
-        painter.drawPath(path)
-
-    def draw_xor_gate(self, painter):
-        """Draw XOR gate shape"""
-        self.draw_or_gate(painter) # Draw OR shape first
-        
-        extra_arc_path = QPainterPath()
-        
-        arc_x_offset = -8
-        extra_arc_path.moveTo(arc_x_offset, -self.height/2)
-        extra_arc_path.quadTo(arc_x_offset + self.width/8, -self.height/4, arc_x_offset + self.width/8, 0)
-        extra_arc_path.quadTo(arc_x_offset + self.width/8, self.height/4, arc_x_offset, self.height/2)
-        painter.drawPath(extra_arc_path)
-    
-    def draw_not_gate(self, painter):
-        """Draw NOT gate shape (triangle with circle)"""
-        triangle = QPolygonF([
-            QPointF(0, -self.height/2 * 0.6), # Make triangle a bit smaller
-            QPointF(0, self.height/2 * 0.6),
-            QPointF(self.width - 10, 0) # Point of triangle before circle
-        ])
-        painter.drawPolygon(triangle)
-        self.draw_negation_circle(painter, self.width - 10, 0) # Circle at output of triangle
-    
     def draw_negation_circle(self, painter, x, y):
         
         circle_radius = 5
@@ -796,9 +1026,17 @@ class GateItem(QGraphicsItem):
 
     def itemChange(self, change, value):
         """Handle item changes (like position changes)"""
-        if change == QGraphicsItem.ItemPositionChange:
-            # Update connected wires when gate moves
+        if change == QGraphicsItem.ItemPositionHasChanged:
+            # Pins moved with the gate, so refresh their positions and wires
+            canvas = _canvas_for(self.scene())
+            for point in self.input_points + self.output_points:
+                point.invalidate_scene_pos()
+                if canvas is not None:
+                    canvas.register_pin(point)
             self.update_connected_wires()
+            self._tikz_line = None
+            _mark_scene_dirty(self)
+        _update_item_registry(self, change)
         return super().itemChange(change, value)
     
     def update_connected_wires(self):
@@ -809,15 +1047,11 @@ class GateItem(QGraphicsItem):
     
     def get_tikz_code(self, gate_id):
         """Generate TikZ code for this gate"""
+        if self._tikz_line and self._tikz_line[0] == gate_id:
+            return self._tikz_line[1]
         x, y = self.pos().x() / 50, -self.pos().y() / 50 # TikZ y-axis is inverted
         
-        tikz_gates = {
-            "AND": "and gate US", "OR": "or gate US", "NOT": "not gate US",
-            "NAND": "nand gate US", "NOR": "nor gate US", "XOR": "xor gate US",
-            "XNOR": "xnor gate US"
-        }
-        gate_name = tikz_gates.get(self.gate_type, "and gate US")
-        inputs_spec = f", inputs={self.num_inputs}" if self.num_inputs > 2 else ""
+        options = _gate_node_options(self.gate_type, self.num_inputs)
         # Add rotation to TikZ node if angle is not 0
         angle = self.angle
         if self.angle == 90:
@@ -826,12 +1060,21 @@ class GateItem(QGraphicsItem):
             angle = 90
         rotation_spec = f", rotate={angle}" if angle != 0 else ""
         
-        return f"    \\node[{gate_name}, draw{inputs_spec}{rotation_spec}] ({gate_id}) at ({x:.2f}, {y:.2f}) {{}};"
+        line = f"    \\node[{options}{rotation_spec}] ({gate_id}) at ({x:.2f}, {y:.2f}) {{}};"
+        self._tikz_line = (gate_id, line)
+        return line
 
 
 class WireItem(QGraphicsItem):
     """Enhanced wire item with better connection handling"""
     
+    _TIKZ_TMPL = "    \\draw ({}) -- ({});"
+    
+    # Outlines the click area; wider than the wire, round ends are easier to hit
+    _SHAPE_STROKER = QPainterPathStroker()
+    _SHAPE_STROKER.setWidth(10)
+    _SHAPE_STROKER.setCapStyle(Qt.RoundCap)
+    
     def __init__(self, start_point, end_point):
         super().__init__()
         self.start_connection = start_point 
@@ -842,80 +1085,85 @@ class WireItem(QGraphicsItem):
         self.wire_width = 2
         self.selected_width = 3
         
+        self._tikz_line = None # ((start_ref, end_ref), line)
+        self._shape_cache = None # Stroked click area, cleared when an end moves
+        self._refresh_endpoints()
+        
         # Register with connection points
         if start_point:
             start_point.add_wire(self)
         if end_point:
             end_point.add_wire(self)
     
+    def _refresh_endpoints(self):
+        """Recompute the cached local end points from the connected points"""
+        self._start_local = self._end_local = None
+        self._diagonal = False
+        if self.start_connection and self.end_connection:
+            self._start_local = self.mapFromScene(self.start_connection.get_scene_pos())
+            self._end_local = self.mapFromScene(self.end_connection.get_scene_pos())
+            self._diagonal = (self._start_local.x() != self._end_local.x()
+                              and self._start_local.y() != self._end_local.y())
+        self._shape_cache = None
+    
     def boundingRect(self):
         if not (self.start_connection and self.end_connection):
             return QRectF()
         
-        start_pos = self.start_connection.get_scene_pos()
-        end_pos = self.end_connection.get_scene_pos()
-        
-        local_start_pos = self.mapFromScene(start_pos)
-        local_end_pos = self.mapFromScene(end_pos)
+        sx, sy = self._start_local.x(), self._start_local.y()
+        ex, ey = self._end_local.x(), self._end_local.y()
 
         # Add some padding for selection
         padding = 5
-        return QRectF(local_start_pos, local_end_pos).normalized().adjusted(-padding, -padding, padding, padding)
+        return QRectF(min(sx, ex) - padding, min(sy, ey) - padding,
+                      abs(ex - sx) + 2 * padding, abs(ey - sy) + 2 * padding)
 
     def paint(self, painter, option, widget):
         if not (self.start_connection and self.end_connection):
             return
             
-        # Get scene positions from connection points
-        start_pos_scene = self.start_connection.get_scene_pos()
-        end_pos_scene = self.end_connection.get_scene_pos()
-
-        # Map to local coordinates for drawing
-        start_pos_local = self.mapFromScene(start_pos_scene)
-        end_pos_local = self.mapFromScene(end_pos_scene)
-        
         # Set pen based on selection state
-        width = self.selected_width if self.isSelected() else self.wire_width
-        pen = QPen(QColor(255, 0, 0) if self.isSelected() else QColor(0, 0, 0), width)
-        painter.setPen(pen)
+        painter.setPen(_WIRE_PEN_SELECTED if self.isSelected() else _WIRE_PEN)
         
-        # Draw the wire with antialiasing
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.drawLine(start_pos_local, end_pos_local)
+        # Horizontal/vertical wires are crisp without antialiasing; only
+        # diagonals need it to avoid jagged edges
+        painter.setRenderHint(QPainter.Antialiasing, self._diagonal)
+        painter.drawLine(self._start_local, self._end_local)
 
     def shape(self):
         """Define the shape for better mouse interaction"""
         if not (self.start_connection and self.end_connection):
             return QPainterPath()
         
-        start_pos_scene = self.start_connection.get_scene_pos()
-        end_pos_scene = self.end_connection.get_scene_pos()
-
-        start_pos_local = self.mapFromScene(start_pos_scene)
-        end_pos_local = self.mapFromScene(end_pos_scene)
-        
-        path = QPainterPath()
-        
-        stroker = QPainterPathStroker()
-        stroker.setWidth(max(10, self.wire_width + 5)) # Make selection area a bit wider than the wire
-        stroker.setCapStyle(Qt.RoundCap) # Makes ends easier to click
+        # Qt asks for the shape on every hover/click test; restroke only after a move
+        if self._shape_cache is None:
+            line_path = QPainterPath()
+            line_path.moveTo(self._start_local)
+            line_path.lineTo(self._end_local)
+            self._shape_cache = self._SHAPE_STROKER.createStroke(line_path)
+        return self._shape_cache
 
-        line_path = QPainterPath()
-        line_path.moveTo(start_pos_local)
-        line_path.lineTo(end_pos_local)
-        
-        return stroker.createStroke(line_path)
+    def itemChange(self, change, value):
+        """Track joining/leaving the scene"""
+        _update_item_registry(self, change)
+        return super().itemChange(change, value)
 
     def update_position(self):
         """Update wire position when connected gates move"""
         self.prepareGeometryChange() # Important for QGraphicsItem when geometry changes
+        self._refresh_endpoints()
         if self.scene():
             self.scene().update(self.sceneBoundingRect()) # Update the region of the scene this wire occupies
         self.update() # Request repaint of the item itself
     
     def get_tikz_code(self, start_ref, end_ref):
         """Generate TikZ code for this wire"""
-        return f"    \\draw ({start_ref}) -- ({end_ref});"
+        refs = (start_ref, end_ref)
+        if self._tikz_line and self._tikz_line[0] == refs:
+            return self._tikz_line[1]
+        line = self._TIKZ_TMPL.format(start_ref, end_ref)
+        self._tikz_line = (refs, line)
+        return line
 
 
 class PreviewWire(QGraphicsItem):
@@ -926,6 +1174,11 @@ class PreviewWire(QGraphicsItem):
         self.start_point = start_point
         self.end_pos = mouse_pos # This is in scene coordinates
         self.setZValue(-1)  # Draw behind other items
+        
+        # Changes shape every frame, so a cached pixmap would only be thrown
+        # away; it is also never a click target
+        self.setCacheMode(QGraphicsItem.NoCache)
+        self.setAcceptedMouseButtons(Qt.NoButton)
     
     def boundingRect(self):
         if not self.start_point:
@@ -949,13 +1202,14 @@ class PreviewWire(QGraphicsItem):
         end_pos_local = self.mapFromScene(end_pos_scene)
         
         # Draw dashed preview line
-        pen = QPen(QColor(100, 100, 100), 2, Qt.DashLine)
-        painter.setPen(pen)
+        painter.setPen(_PREVIEW_WIRE_PEN)
         painter.setRenderHint(QPainter.Antialiasing)
         painter.drawLine(start_pos_local, end_pos_local)
     
     def update_end_pos(self, scene_pos): # scene_pos is the new mouse position in scene coords
         """Update the end position of the preview wire"""
+        if (scene_pos - self.end_pos).manhattanLength() < 1:
+            return # Sub-pixel move; nothing visible would change
         self.prepareGeometryChange()
         self.end_pos = scene_pos # Store new scene coordinate
         self.update()
@@ -964,6 +1218,8 @@ class PreviewWire(QGraphicsItem):
 class CanvasWithRulers(QWidget):
     """Widget that combines canvas with rulers"""
     
+    RULER_SIZE = 25  # Thickness of the rulers and the corner square
+    
     def __init__(self, circuit_canvas):
         super().__init__()
         self.canvas = circuit_canvas
@@ -973,33 +1229,53 @@ class CanvasWithRulers(QWidget):
 
     def setup_ui(self):
         """Set up the UI with rulers and canvas"""
-        layout = QGridLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(0)
-        
         # Get rulers from the canvas's ruler manager
-        h_ruler, v_ruler = self.canvas.ruler_manager.get_rulers()
+        self.h_ruler, self.v_ruler = self.canvas.ruler_manager.get_rulers()
         
         # Create corner widget (top-left corner)
-        corner = QFrame()
-        corner.setFixedSize(25, 25)
-        corner.setStyleSheet("background-color: #f0f0f0; border: 1px solid #999;")
-        
-        # Add widgets to grid layout
-        layout.addWidget(corner, 0, 0)          # Top-left corner
-        layout.addWidget(h_ruler, 0, 1)         # Horizontal ruler (top)
-        layout.addWidget(v_ruler, 1, 0)         # Vertical ruler (left)
-        layout.addWidget(self.canvas, 1, 1)     # Canvas (main area)
+        self.corner = QFrame()
+        self.corner.setStyleSheet("background-color: #f0f0f0; border: 1px solid #999;")
         
-        # Make sure the canvas takes up remaining space
-        layout.setRowStretch(1, 1)
-        layout.setColumnStretch(1, 1)
+        # Fixed 2x2 arrangement, placed by hand in resizeEvent rather than by a
+        # layout that re-solves on every resize during a window drag
+        rulers_visible = self.canvas.ruler_manager.is_enabled()
+        for widget, visible in ((self.corner, rulers_visible), (self.h_ruler, rulers_visible),
+                                (self.v_ruler, rulers_visible), (self.canvas, True)):
+            widget.setParent(self)
+            widget.setVisible(visible) # Reparenting hides a widget
         
         # Connect ruler updates to canvas view changes
         self.canvas.ruler_manager.rulers_toggled.connect(self.on_rulers_toggled)
     
+    def _ruler_margin(self):
+        return self.RULER_SIZE if self.canvas.ruler_manager.is_enabled() else 0
+    
+    def sizeHint(self):
+        # No layout to ask, so add the rulers to the canvas's own hints
+        margin = self._ruler_margin()
+        return self.canvas.sizeHint() + QSize(margin, margin)
+    
+    def minimumSizeHint(self):
+        margin = self._ruler_margin()
+        return self.canvas.minimumSizeHint() + QSize(margin, margin)
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.layout_children()
+    
+    def layout_children(self):
+        """Place the corner, rulers and canvas; the canvas takes the whole area without rulers"""
+        size = self._ruler_margin()
+        width, height = self.width(), self.height()
+        self.corner.setGeometry(0, 0, size, size)           # Top-left corner
+        self.h_ruler.setGeometry(size, 0, width - size, size)  # Horizontal ruler (top)
+        self.v_ruler.setGeometry(0, size, size, height - size) # Vertical ruler (left)
+        self.canvas.setGeometry(size, size, width - size, height - size) # Canvas (main area)
+    
     def on_rulers_toggled(self, visible):
-        pass
+        self.corner.setVisible(visible)
+        self.updateGeometry() # Size hints depend on the rulers
+        self.layout_children()
 
 class ToolPanel(QWidget):
     """Tool panel with gate selection and properties, now using QToolBox."""
@@ -1024,8 +1300,9 @@ class ToolPanel(QWidget):
         gate_types = ["AND", "OR", "NOT", "NAND", "NOR", "XOR", "XNOR"]
         for gate in gate_types:
             btn = QPushButton(gate)
+            btn.setProperty("tool", gate)
             
-            btn.clicked.connect(lambda checked, g=gate: self.tool_selected.emit(g))
+            btn.clicked.connect(self._on_tool_clicked)
             gates_layout.addWidget(btn)
 
         gates_layout.addStretch()
@@ -1037,8 +1314,9 @@ class ToolPanel(QWidget):
         circuit_components = ["Resistor", "Capacitor", "Inductor", "VoltageSource", "CurrentSource"]
         for component in circuit_components:
             btn = QPushButton(component)
+            btn.setProperty("tool", component)
 
-            btn.clicked.connect(lambda checked, c=component: self.tool_selected.emit(c))
+            btn.clicked.connect(self._on_tool_clicked)
             circuits_layout.addWidget(btn)
 
         circuits_layout.addStretch()
@@ -1061,6 +1339,10 @@ class ToolPanel(QWidget):
         main_layout.addStretch()
         # self.setLayout(main_layout)
 
+    def _on_tool_clicked(self):
+        """Select the tool stored on the clicked button"""
+        self.tool_selected.emit(self.sender().property("tool"))
+
 
 
 class CodeViewer(QWidget):
@@ -1068,6 +1350,7 @@ class CodeViewer(QWidget):
     
     def __init__(self):
         super().__init__()
+        self._last_code = "" # What set_code put in, valid until the user edits
         self.setup_ui()
         
     def setup_ui(self):
@@ -1078,8 +1361,9 @@ class CodeViewer(QWidget):
         layout.addWidget(label)
         
         # Text editor
-        self.text_edit = QTextEdit()
+        self.text_edit = QPlainTextEdit()
         self.text_edit.setFont(QFont("Courier", 10))
+        self.text_edit.setLineWrapMode(QPlainTextEdit.NoWrap)
         layout.addWidget(self.text_edit)
         
         # Buttons
@@ -1110,11 +1394,60 @@ class CodeViewer(QWidget):
         
     def copy_to_clipboard(self):
         """Copy code to clipboard"""
-        QApplication.clipboard().setText(self.text_edit.toPlainText())
+        QApplication.clipboard().setText(self._current_code())
+        
+    def _current_code(self):
+        # Only read the document back if the user has typed into it
+        if self.text_edit.document().isModified():
+            return self.text_edit.toPlainText()
+        return self._last_code
         
     def set_code(self, code):
         """Set the displayed code"""
-        self.text_edit.setText(code)
+        document = self.text_edit.document()
+        if document.isModified():
+            # Hand-edited; we don't know what is in there, so replace it all
+            if code != self.text_edit.toPlainText():
+                self.text_edit.setPlainText(code)
+        elif code != self._last_code:
+            # Edits usually touch a few lines in the middle; swap just that span
+            old = self._last_code
+            prefix = len(os.path.commonprefix([old, code]))
+            suffix = len(os.path.commonprefix([old[prefix:][::-1], code[prefix:][::-1]]))
+            # Generated code is not the user's edit; keep it off the undo stack,
+            # as setPlainText would
+            self.text_edit.setUndoRedoEnabled(False)
+            cursor = QTextCursor(document)
+            cursor.setPosition(prefix)
+            cursor.setPosition(len(old) - suffix, QTextCursor.KeepAnchor)
+            cursor.insertText(code[prefix:len(code) - suffix])
+            self.text_edit.setUndoRedoEnabled(True)
+        document.setModified(False)
+        self._last_code = code
+
+
+class PdfWorkerSignals(QObject):
+    """Signals for PdfWorker; QRunnable itself cannot emit"""
+    
+    finished = pyqtSignal(str, str)  # (filename, error message or "")
+
+
+class PdfWorker(QRunnable):
+    """Runs the LaTeX build for a PDF export on a pool thread"""
+    
+    def __init__(self, doc, filename):
+        super().__init__()
+        self.doc = doc
+        self.filename = filename
+        self.signals = PdfWorkerSignals()
+        
+    def run(self):
+        try:
+            self.doc.generate_pdf(self.filename.replace('.pdf', ''), clean_tex=False)
+        except Exception as e:
+            self.signals.finished.emit(self.filename, str(e))
+            return
+        self.signals.finished.emit(self.filename, "")
 
 
 class LaTeXCircuitDesigner(QMainWindow):
@@ -1123,9 +1456,14 @@ class LaTeXCircuitDesigner(QMainWindow):
     def __init__(self):
         super().__init__()
         self.main_toolbar = HorizontalActionsToolbar(self)
+        self._code_revision = None
+        self._code_update_pending = False
+        self._code_update_deferred = False # Set while hidden, flushed on show
+        self._watched_window = None # Top-level window whose minimize/restore we follow
         self.setup_ui()
         self.setup_menu()
         self.setup_connections()
+        self.update_code()
         
     def setup_ui(self):
         self.setWindowTitle("LaTeX Circuit Designer")
@@ -1157,15 +1495,11 @@ class LaTeXCircuitDesigner(QMainWindow):
         
         # Set splitter proportions
         splitter.setSizes([200, 650, 350])
+        splitter.splitterMoved.connect(self.on_splitter_moved)
         
         main_layout.addWidget(splitter)
         central_widget.setLayout(main_layout)
         
-        # Auto-update code periodically
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_code)
-        self.update_timer.start(1000)
-        
     def setup_menu(self):
             menubar = self.menuBar()
 
@@ -1187,6 +1521,7 @@ class LaTeXCircuitDesigner(QMainWindow):
     def setup_connections(self):
         """Setup signal connections"""
         self.tool_panel.tool_selected.connect(self.canvas.set_tool)
+        self.canvas.scene_changed.connect(self.schedule_code_update)
         self.code_viewer.export_pdf_requested = self.export_pdf
         # Connect the new rotate action if it exists on the toolbar
         if hasattr(self.main_toolbar, 'rotate_action'):
@@ -1212,7 +1547,8 @@ class LaTeXCircuitDesigner(QMainWindow):
 
     def new_circuit(self):
         """Create a new circuit"""
-        self.canvas.scene.clear()
+        self.canvas.clear_circuit()
+        self.canvas.mark_scene_dirty()
         self.update_code()
         
     def open_circuit(self):
@@ -1230,9 +1566,8 @@ class LaTeXCircuitDesigner(QMainWindow):
         )
         if filename:
             try:
-                code = self.canvas.get_all_tikz_code()
                 with open(filename, 'w') as f:
-                    f.write(code)
+                    f.writelines(line + "\n" for line in self.canvas.iter_tikz_code())
                 QMessageBox.information(self, "Success", f"TikZ code exported to {filename}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to export: {str(e)}")
@@ -1244,11 +1579,22 @@ class LaTeXCircuitDesigner(QMainWindow):
         )
         if filename:
             try:
+                # Build the document here; items must not be touched off the GUI thread
                 doc = self.canvas.generate_complete_document()
-                doc.generate_pdf(filename.replace('.pdf', ''), clean_tex=False)
-                QMessageBox.information(self, "Success", f"PDF exported to {filename}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to export PDF: {str(e)}")
+                return
+            # The LaTeX run can take seconds, so keep it off the GUI thread
+            worker = PdfWorker(doc, filename)
+            worker.signals.finished.connect(self.on_pdf_exported)
+            QThreadPool.globalInstance().start(worker)
+    
+    def on_pdf_exported(self, filename, error):
+        """Report the result of a background PDF export"""
+        if error:
+            QMessageBox.critical(self, "Error", f"Failed to export PDF: {error}")
+        else:
+            QMessageBox.information(self, "Success", f"PDF exported to {filename}")
     
     def export_complete_document(self):
         """Export complete LaTeX document"""
@@ -1271,8 +1617,7 @@ class LaTeXCircuitDesigner(QMainWindow):
                 for cp in item.input_points + item.output_points:
                     # Remove wires connected to this connection point
                     for wire in list(cp.connected_wires): # Iterate over a copy
-                        if wire.scene():
-                            wire.scene().removeItem(wire)
+                        self.canvas.remove_item(wire)
                         # Clean up references in other connection point/junction
                         if wire.start_connection == cp and wire.end_connection:
                             wire.end_connection.remove_wire(wire)
@@ -1288,23 +1633,74 @@ class LaTeXCircuitDesigner(QMainWindow):
                     item.start_connection.remove_wire(item)
                 if item.end_connection:
                     item.end_connection.remove_wire(item)
-            
+        
             # For JunctionPoint, remove connected wires
             elif isinstance(item, JunctionPoint):
                 for wire in list(item.connected_wires): # Iterate over a copy
-                    if wire.scene():
-                        wire.scene().removeItem(wire)
+                    self.canvas.remove_item(wire)
                      # Clean up references in other connection point/junction
                     if wire.start_connection == item and wire.end_connection:
                         wire.end_connection.remove_wire(wire)
                     elif wire.end_connection == item and wire.start_connection:
                         wire.start_connection.remove_wire(wire)
-            
-            if item.scene(): # Ensure item is still in scene before removing
-                 self.canvas.scene.removeItem(item)
+        
+            self.canvas.remove_item(item)
+        self.canvas.mark_scene_dirty()
         self.update_code()
         
+    def schedule_code_update(self):
+        """Refresh the code view shortly, coalescing bursts of edits (e.g. drags)"""
+        if self._code_update_pending:
+            return
+        self._code_update_pending = True
+        QTimer.singleShot(150, self._flush_code_update)
+
+    def _flush_code_update(self):
+        self._code_update_pending = False
+        self.update_code()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._watch_window_state()
+        if self._code_update_deferred:
+            self.update_code()
+
+    def _watch_window_state(self):
+        """Follow minimize/restore of whichever window we end up in (e.g. a tab in main.py)"""
+        window = self.window()
+        if window is self or window is self._watched_window:
+            return # Our own state changes arrive in changeEvent
+        if self._watched_window is not None:
+            self._watched_window.removeEventFilter(self)
+        window.installEventFilter(self)
+        self._watched_window = window
+
+    def eventFilter(self, obj, event):
+        if (obj is self._watched_window and event.type() == QEvent.WindowStateChange
+                and self._code_update_deferred):
+            self.update_code()
+        return super().eventFilter(obj, event)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange and self._code_update_deferred:
+            self.update_code()
+
+    def on_splitter_moved(self, pos, index):
+        # A collapsed code panel stays "visible" at zero width, catch up once it is dragged open
+        if self._code_update_deferred:
+            self.update_code()
+
     def update_code(self):
+        if (not self.isVisible() or self.window().isMinimized() or not self.code_viewer.isVisible()
+                or self.code_viewer.visibleRegion().isEmpty()):
+            self._code_update_deferred = True # Nobody can see it, catch up when shown
+            return
+        self._code_update_deferred = False
+        revision = self.canvas.get_scene_revision()
+        if revision == self._code_revision:
+            return # Nothing changed since the last refresh
+        self._code_revision = revision
         code = self.canvas.get_all_tikz_code()
         self.code_viewer.set_code(code)
 
@@ -97,6 +97,10 @@ class RulerManager(QObject):
         """Enable/disable snapping to guides"""
         self.guide_manager.set_snap_enabled(enabled)
         
+    def is_guide_snap_enabled(self):
+        """Check if snapping to guides is enabled"""
+        return self.guide_manager.snap_enabled
+        
     def set_guide_snap_threshold(self, threshold):
         """Set guide snap threshold"""
         self.guide_manager.set_snap_threshold(threshold)
@@ -11,7 +11,7 @@ class BaseRuler(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setFixedHeight(25) if hasattr(self, '_is_horizontal') else self.setFixedWidth(25)
+        self.setFixedHeight(25) if getattr(self, '_is_horizontal', False) else self.setFixedWidth(25)
         self.scale = 1.0
         self.offset = 0.0
         self.grid_size = 25
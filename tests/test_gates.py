@@ -0,0 +1,66 @@
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+from logic.gates import CircuitCanvas, GateItem
+from main import MainApp
+
+
+class EmbeddedDesignerTest(unittest.TestCase):
+    """The designer as main.py runs it: a tab inside MainApp"""
+
+    def setUp(self):
+        self.window = MainApp()
+        self.window.show()
+        app.processEvents()
+        self.designer = self.window.tabs.widget(0)
+
+    def tearDown(self):
+        self.window.close()
+
+    def code_text(self):
+        return self.designer.code_viewer.text_edit.toPlainText()
+
+    def test_code_update_waits_for_restore_when_minimized(self):
+        self.window.setWindowState(Qt.WindowMinimized)
+        app.processEvents()
+
+        self.designer.canvas.add_gate(GateItem("AND", 0, 0))
+        self.designer.canvas.mark_scene_dirty()
+        self.designer.update_code()
+        self.assertTrue(self.designer._code_update_deferred)
+        self.assertNotIn("and gate US", self.code_text())
+
+        self.window.setWindowState(Qt.WindowNoState)
+        app.processEvents()
+        self.assertFalse(self.designer._code_update_deferred)
+        self.assertIn("and gate US", self.code_text())
+
+
+class CanvasRegistryTest(unittest.TestCase):
+    """Items added or removed through the scene itself, not the canvas helpers"""
+
+    def setUp(self):
+        self.canvas = CircuitCanvas()
+        self.canvas.get_all_tikz_code() # Prime the cache
+
+    def test_gate_added_to_scene_directly_is_in_tikz(self):
+        self.canvas.scene.addItem(GateItem("AND", 0, 0))
+        self.assertIn("and gate US", self.canvas.get_all_tikz_code())
+
+    def test_gate_removed_from_scene_directly_leaves_tikz(self):
+        gate = GateItem("OR", 0, 0)
+        self.canvas.add_gate(gate)
+        self.assertIn("or gate US", self.canvas.get_all_tikz_code())
+        self.canvas.scene.removeItem(gate)
+        self.assertNotIn("or gate US", self.canvas.get_all_tikz_code())
+
+
+if __name__ == "__main__":
+    unittest.main()